@@ -8,6 +8,40 @@ class Database:
     
 db = Database()
 
+# (collection, keys, create_index options) created on startup
+INDEXES = [
+    # Users indexes
+    ("users", "username", {"unique": True}),
+    ("users", [("is_active", 1), ("points", -1)], {}),
+    
+    # Stories indexes
+    ("stories", "author_id", {}),
+    ("stories", "status", {}),
+    ("stories", [("published_at", -1)], {}),
+    ("stories", [("author_id", 1), ("status", 1)], {}),
+    ("stories", "liked_by", {}),
+    
+    # Videos indexes
+    ("videos", [("status", 1), ("created_at", -1), ("_id", -1)], {}),
+    ("videos", [("author_id", 1), ("status", 1)], {}),
+    ("videos", [("author_id", 1), ("created_at", -1)], {}),
+    ("videos", "liked_by", {}),
+    ("videos", "tags", {}),
+    ("videos", [("caption", "text"), ("tags", "text")], {}),
+    
+    # Comments indexes
+    ("comments", "user_id", {}),
+    ("comments", "liked_by", {}),
+    
+    # Refresh tokens indexes
+    ("refresh_tokens", "username", {}),
+    ("refresh_tokens", "token", {"unique": True}),
+    
+    # Last: duplicate codes left by older lazy assignment can make this one fail.
+    # Sparse: the admin and legacy accounts (until their first /me/referral) have no code
+    ("users", "referral_code", {"unique": True, "sparse": True}),
+]
+
 async def get_database():
     return db.client[settings.database_name]
 
@@ -36,24 +70,15 @@ async def connect_to_mongo():
             await database.create_collection(collection_name)
             print(f"📦 Created collection: {collection_name}")
     
-    # Create indexes for better performance
-    try:
-        # Users indexes
-        await database.users.create_index("username", unique=True)
-        
-        # Stories indexes
-        await database.stories.create_index("author_id")
-        await database.stories.create_index("status")
-        await database.stories.create_index([("published_at", -1)])
-        
-        # Refresh tokens indexes
-        await database.refresh_tokens.create_index("username")
-        await database.refresh_tokens.create_index("token", unique=True)
-        
-        print(f"✅ Database '{settings.database_name}' initialized with collections and indexes")
-    except Exception as e:
-        # Indexes might already exist, that's okay
-        print(f"ℹ️ Indexes setup: {e}")
+    # Create indexes for better performance; each on its own so one failure doesn't skip the rest
+    for collection_name, keys, options in INDEXES:
+        try:
+            await database[collection_name].create_index(keys, **options)
+        except Exception as e:
+            # Indexes might already exist (or hit bad data, e.g. duplicate referral codes)
+            print(f"ℹ️ Index setup for {collection_name} {keys}: {e}")
+    
+    print(f"✅ Database '{settings.database_name}' initialized with collections and indexes")
 
 async def close_mongo_connection():
     db.client.close()
@@ -41,6 +41,17 @@ async def init_database():
                     ("tags", 1),
                 ]
             },
+            "videos": {
+                "indexes": [
+                    # Compound indexes are given as a key list: (keys, options)
+                    ([("status", 1), ("created_at", -1), ("_id", -1)],),
+                    ([("author_id", 1), ("status", 1)],),
+                    ([("author_id", 1), ("created_at", -1)],),
+                    ("liked_by", 1),
+                    ("tags", 1),
+                    ([("caption", "text"), ("tags", "text")],),
+                ]
+            },
             "refresh_tokens": {
                 "indexes": [
                     ("username", 1),
@@ -64,13 +75,18 @@ async def init_database():
             print(f"🔧 Setting up indexes for {collection_name}...")
             
             for index_config in config["indexes"]:
-                field = index_config[0]
-                direction = index_config[1]
-                options = index_config[2] if len(index_config) > 2 else {}
+                if isinstance(index_config[0], list):
+                    keys = index_config[0]
+                    options = index_config[1] if len(index_config) > 1 else {}
+                    field = ", ".join(f"{name} {direction}" for name, direction in keys)
+                else:
+                    keys = [(index_config[0], index_config[1])]
+                    options = index_config[2] if len(index_config) > 2 else {}
+                    field = index_config[0]
                 
                 try:
                     await collection.create_index(
-                        [(field, direction)],
+                        keys,
                         **options
                     )
                     print(f"  ✓ Index created: {field}")
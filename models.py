@@ -331,7 +331,8 @@ class VideoResponse(Video):
 
 class VideoListResponse(BaseModel):
     videos: List[VideoResponse]
-    total: int
+    total: Optional[int] = None  # Only set on the first page; clients reuse it
+    next_cursor: Optional[str] = None  # Pass as `after` to fetch the next page
 
 
 class VideoLike(BaseModel):
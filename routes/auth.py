@@ -3,6 +3,7 @@ from slowapi import Limiter
 from slowapi.util import get_remote_address
 from datetime import datetime, timedelta
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 from models import UserCreate, UserLogin, Token, RefreshTokenRequest, UserRole, UserResponse, OTPCreate, OTPVerify
 from auth import (
     get_password_hash, 
@@ -36,6 +37,30 @@ def generate_referral_code(length: int = 8) -> str:
     return ''.join(secrets.choice(characters) for _ in range(length))
 
 
+async def with_unique_referral_code(write, max_attempts: int = 5):
+    """Run `await write(code)` with fresh referral codes, retrying on the rare code collision"""
+    for _ in range(max_attempts):
+        try:
+            return await write(generate_referral_code())
+        except DuplicateKeyError as e:
+            # Uniqueness is enforced by the referral_code index; other duplicates are real errors
+            if "referral_code" not in str(e):
+                raise
+    raise HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail="Could not generate a unique referral code"
+    )
+
+
+async def insert_user_with_referral_code(db, user_doc: dict):
+    """Insert a new user with a fresh referral code"""
+    async def insert(referral_code: str):
+        user_doc["referral_code"] = referral_code
+        return await db.users.insert_one(user_doc)
+    
+    return await with_unique_referral_code(insert)
+
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 @limiter.limit("5/minute")
 async def register(request: Request, user: UserCreate, db=Depends(get_database)):
@@ -64,11 +89,6 @@ async def register(request: Request, user: UserCreate, db=Depends(get_database))
     while await db.users.find_one({"anonymous_name": anonymous_name}):
         anonymous_name = generate_anonymous_name()
     
-    # Generate unique referral code for new user
-    referral_code = generate_referral_code()
-    while await db.users.find_one({"referral_code": referral_code}):
-        referral_code = generate_referral_code()
-    
     # Handle referral code if provided
     referrer_id = None
     if user.referral_code:
@@ -96,12 +116,11 @@ async def register(request: Request, user: UserCreate, db=Depends(get_database))
         "created_at": datetime.utcnow(),
         "is_active": True,
         "points": 0,
-        "referral_code": referral_code,
         "referred_by": referrer_id,
         "referral_count": 0
     }
     
-    result = await db.users.insert_one(user_doc)
+    result = await insert_user_with_referral_code(db, user_doc)
     user_doc["_id"] = str(result.inserted_id)
     
     return UserResponse(
@@ -185,14 +204,14 @@ async def login(request: Request, user: UserLogin, db=Depends(get_database)):
 
 @router.post("/refresh", response_model=Token)
 @limiter.limit("20/minute")
-async def refresh_token(req: Request, request: RefreshTokenRequest, db=Depends(get_database)):
+async def refresh_token(request: Request, refresh_request: RefreshTokenRequest, db=Depends(get_database)):
     # Verify refresh token
-    token_data = await verify_token(request.refresh_token, "refresh")
+    token_data = await verify_token(refresh_request.refresh_token, "refresh")
     
     # Check if refresh token exists in database and is not expired
     refresh_token_doc = await db.refresh_tokens.find_one({
         "username": token_data.username,
-        "token": request.refresh_token
+        "token": refresh_request.refresh_token
     })
     
     if not refresh_token_doc:
@@ -374,10 +393,12 @@ async def verify_otp(otp_verify: OTPVerify, db=Depends(get_database)):
             "anonymous_name": anonymous_name,
             "role": UserRole.USER,
             "created_at": datetime.utcnow(),
-            "is_active": True
+            "is_active": True,
+            "points": 0,
+            "referral_count": 0
         }
         
-        result = await db.users.insert_one(user_doc)
+        result = await insert_user_with_referral_code(db, user_doc)
         user = await db.users.find_one({"_id": result.inserted_id})
     
     # Create tokens
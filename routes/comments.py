@@ -417,67 +417,6 @@ async def toggle_comment_like(
     }
 
 
-@router.post("/{comment_id}/like")
-async def toggle_comment_like(
-    comment_id: str,
-    current_user: dict = Depends(get_current_user),
-    db = Depends(get_database)
-):
-    """Like or unlike a comment"""
-    try:
-        comment_obj_id = ObjectId(comment_id)
-    except:
-        raise HTTPException(status_code=400, detail="Invalid comment ID")
-    
-    comment = await db.comments.find_one({"_id": comment_obj_id})
-    if not comment:
-        raise HTTPException(status_code=404, detail="Comment not found")
-    
-    user_id = str(current_user["_id"])
-    liked_by = comment.get("liked_by", [])
-    
-    # Check if user already liked this comment
-    if user_id in liked_by:
-        # Unlike: remove user from liked_by array
-        await db.comments.update_one(
-            {"_id": comment_obj_id},
-            {
-                "$pull": {"liked_by": user_id},
-                "$inc": {"likes": -1}
-            }
-        )
-        liked = False
-        new_likes = comment.get("likes", 0) - 1
-        points_earned = 0
-    else:
-        # Like: add user to liked_by array
-        await db.comments.update_one(
-            {"_id": comment_obj_id},
-            {
-                "$addToSet": {"liked_by": user_id},
-                "$inc": {"likes": 1}
-            }
-        )
-        liked = True
-        new_likes = comment.get("likes", 0) + 1
-        
-        # Award points to comment author if they reach 1000 likes milestone
-        points_earned = 0
-        if new_likes > 0 and new_likes % 1000 == 0:
-            await db.users.update_one(
-                {"_id": ObjectId(comment["user_id"])},
-                {"$inc": {"points": 1}}
-            )
-            points_earned = 1
-    
-    return {
-        "liked": liked,
-        "total_likes": max(0, new_likes),
-        "points_earned": points_earned
-    }
-
-
-
 @router.post("/shot/{shot_id}", response_model=CommentResponse, status_code=status.HTTP_201_CREATED)
 async def create_shot_comment(
     shot_id: str,
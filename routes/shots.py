@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Request
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional
 from datetime import datetime
 from bson import ObjectId
@@ -86,7 +87,8 @@ async def upload_shot_image(
     if settings.use_s3:
         try:
             # Upload to S3 (returns S3 key, not URL)
-            s3_key = s3_storage.upload_file(
+            s3_key = await run_in_threadpool(
+                s3_storage.upload_file,
                 file_content=file_content,
                 filename=file.filename,
                 content_type=file.content_type or "image/jpeg",
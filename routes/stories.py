@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request
+from fastapi.concurrency import run_in_threadpool
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from typing import List, Optional
@@ -94,7 +95,8 @@ async def upload_image(
     if settings.use_s3:
         try:
             # Upload to S3 (returns S3 key, not URL)
-            s3_key = s3_storage.upload_file(
+            s3_key = await run_in_threadpool(
+                s3_storage.upload_file,
                 file_content=file_content,
                 filename=file.filename,
                 content_type=file.content_type or "image/jpeg"
@@ -664,46 +666,3 @@ async def get_story(
         published_at=story.get("published_at"),
         rejection_reason=story.get("rejection_reason")
     )
-
-
-@router.get("/author/{author_id}", response_model=StoryListResponse)
-async def get_author_stories(
-    author_id: str,
-    page: int = 1,
-    page_size: int = 10,
-    db=Depends(get_database)
-):
-    """Get all approved stories by a specific author (public endpoint)"""
-    skip = (page - 1) * page_size
-    
-    # Get approved stories by author
-    query = {"author_id": author_id, "status": StoryStatus.APPROVED}
-    cursor = db.stories.find(query).sort("published_at", -1).skip(skip).limit(page_size)
-    stories = await cursor.to_list(length=page_size)
-    
-    total = await db.stories.count_documents(query)
-    
-    story_responses = [
-        StoryResponse(
-            id=str(story["_id"]),
-            title=story["title"],
-            content=story["content"],
-            author_anonymous_name=story["author_anonymous_name"],
-            author_id=story["author_id"],
-            images=[StoryImage(**img) for img in convert_image_urls(story["images"])],
-            tags=story["tags"],
-            status=story["status"],
-            created_at=story["created_at"],
-            updated_at=story["updated_at"],
-            published_at=story.get("published_at")
-        )
-        for story in stories
-    ]
-    
-    return StoryListResponse(
-        stories=story_responses,
-        total=total,
-        page=page,
-        page_size=page_size
-    )
-
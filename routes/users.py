@@ -1,15 +1,20 @@
 """
 User stats, referrals, and points management endpoints
 """
-from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from typing import Optional
 from datetime import datetime
 from bson import ObjectId
 from slowapi import Limiter
 from slowapi.util import get_remote_address
+import asyncio
+import hashlib
 import logging
+import orjson
+from cachetools import TTLCache
 
 from auth import get_current_user, get_optional_user
+from config import get_settings
 from database import get_database
 from models import (
     UserStats,
@@ -18,151 +23,152 @@ from models import (
     ShareLink,
     UserLikedPosts,
 )
-import secrets
+from routes.auth import with_unique_referral_code
 
 logger = logging.getLogger(__name__)
-import string
 
 router = APIRouter()
+settings = get_settings()
 limiter = Limiter(key_func=get_remote_address)
 
+# Fields read by the stats endpoints (skips password hash and other large fields)
+USER_STATS_PROJECTION = {"username": 1, "anonymous_name": 1, "referral_code": 1, "referral_count": 1}
 
-def generate_referral_code(length: int = 8) -> str:
-    """Generate a unique referral code"""
-    characters = string.ascii_uppercase + string.digits
-    return ''.join(secrets.choice(characters) for _ in range(length))
+REFERRAL_LINK_TEMPLATE = f"{settings.frontend_url}/register?ref={{code}}"
 
+# Leaderboard entries keyed by limit; points move slowly so 45s staleness is fine
+leaderboard_cache = TTLCache(maxsize=32, ttl=45)
 
-async def calculate_user_points(user_id: str, db) -> PointsBreakdown:
-    """Calculate user's points from all sources"""
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
-    if not user:
-        return PointsBreakdown()
-    
-    # Referral points: 10 points per referral
-    referral_points = user.get("referral_count", 0) * 10
-    
-    # Story points: 1 point per published story
-    stories_count = await db.stories.count_documents({
-        "author_id": user_id,
-        "status": "approved"
-    })
-    story_points = stories_count * 1  # Make it explicit: 1 point per story
-    
-    # Like points: 1 point per 1000 likes across all content
-    # Get total likes from stories
-    story_pipeline = [
-        {"$match": {"author_id": user_id}},
-        {"$group": {"_id": None, "total_likes": {"$sum": {"$ifNull": ["$likes", 0]}}}}
-    ]
-    story_likes_result = await db.stories.aggregate(story_pipeline).to_list(1)
-    story_likes = story_likes_result[0]["total_likes"] if story_likes_result else 0
+
+async def assign_referral_code(user_oid: ObjectId, db) -> str:
+    """Give a legacy account a referral code, keeping the first one if requests race"""
+    async def claim(referral_code: str) -> str:
+        # Only set the code if no concurrent request has assigned one already
+        result = await db.users.update_one(
+            {"_id": user_oid, "referral_code": {"$in": [None, ""]}},
+            {"$set": {"referral_code": referral_code}}
+        )
+        if result.modified_count:
+            return referral_code
+        user = await db.users.find_one({"_id": user_oid}, {"referral_code": 1})
+        return user["referral_code"]
     
-    # Get total likes from videos
-    video_pipeline = [
+    return await with_unique_referral_code(claim)
+
+
+def etag_not_modified(request: Request, response: Response, body: bytes) -> bool:
+    """Set ETag/Cache-Control for a payload and report whether the client copy is still fresh"""
+    etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    response.headers["ETag"] = etag
+    # no-cache: clients may keep a copy but must revalidate it (via If-None-Match) on every request
+    response.headers["Cache-Control"] = "private, no-cache"
+    if_none_match = request.headers.get("if-none-match", "")
+    return etag in [tag.strip() for tag in if_none_match.split(",")]
+
+
+def _content_totals_stage(source: str) -> dict:
+    """$group stage tagging a collection's approved count and like total with its name"""
+    return {"$group": {
+        "_id": source,
+        "approved": {"$sum": {"$cond": [{"$eq": ["$status", "approved"]}, 1, 0]}},
+        "likes": {"$sum": "$likes"}
+    }}
+
+
+async def user_content_totals(user_id: str, db) -> dict:
+    """Approved counts and like totals for a user's stories, videos, comments and shots in one round-trip"""
+    pipeline = [
         {"$match": {"author_id": user_id}},
-        {"$group": {"_id": None, "total_likes": {"$sum": {"$ifNull": ["$likes", 0]}}}}
+        _content_totals_stage("stories"),
+        {"$unionWith": {"coll": "videos", "pipeline": [
+            {"$match": {"author_id": user_id}},
+            _content_totals_stage("videos")
+        ]}},
+        {"$unionWith": {"coll": "comments", "pipeline": [
+            # Comments store the author as an ObjectId, unlike stories/videos
+            {"$match": {"user_id": ObjectId(user_id)}},
+            _content_totals_stage("comments")
+        ]}},
+        {"$unionWith": {"coll": "shots", "pipeline": [
+            {"$match": {"author_id": user_id}},
+            _content_totals_stage("shots")
+        ]}}
     ]
-    video_likes_result = await db.videos.aggregate(video_pipeline).to_list(1)
-    video_likes = video_likes_result[0]["total_likes"] if video_likes_result else 0
+    results = await db.stories.aggregate(pipeline).to_list(4)
     
-    # Get total likes from comments
-    comment_pipeline = [
-        {"$match": {"user_id": user_id}},
-        {"$group": {"_id": None, "total_likes": {"$sum": {"$ifNull": ["$likes", 0]}}}}
-    ]
-    comment_likes_result = await db.comments.aggregate(comment_pipeline).to_list(1)
-    comment_likes = comment_likes_result[0]["total_likes"] if comment_likes_result else 0
+    totals = {source: {"approved": 0, "likes": 0} for source in ("stories", "videos", "comments", "shots")}
+    for result in results:
+        totals[result["_id"]] = {"approved": result["approved"], "likes": result["likes"]}
+    return totals
+
+
+def calculate_user_points(totals: dict, referral_count: int) -> PointsBreakdown:
+    """Calculate user's points from all sources, given user_content_totals and the referral count"""
+    # Referral points: 10 points per referral
+    referral_points = referral_count * 10
     
-    # Get total likes from shots
-    shot_pipeline = [
-        {"$match": {"author_id": user_id}},
-        {"$group": {"_id": None, "total_likes": {"$sum": {"$ifNull": ["$likes", 0]}}}}
-    ]
-    shot_likes_result = await db.shots.aggregate(shot_pipeline).to_list(1)
-    shot_likes = shot_likes_result[0]["total_likes"] if shot_likes_result else 0
+    # Story points: 1 point per published story
+    story_points = totals["stories"]["approved"] * 1  # Make it explicit: 1 point per story
     
-    total_likes = story_likes + video_likes + comment_likes + shot_likes
+    # Like points: 1 point per 1000 likes across all content
+    total_likes = sum(source["likes"] for source in totals.values())
     like_points = total_likes // 1000
     
-    total_points = referral_points + story_points + like_points
-    
-    logger.info(f"Points calculation for user {user_id}: stories={stories_count}, story_points={story_points}, story_likes={story_likes}, video_likes={video_likes}, comment_likes={comment_likes}, shot_likes={shot_likes}, total_points={total_points}")
-    
     return PointsBreakdown(
         referral_points=referral_points,
         story_points=story_points,
         like_points=like_points,
-        total_points=total_points
+        total_points=referral_points + story_points + like_points
     )
 
 
-async def update_user_points(user_id: str, db) -> int:
-    """Recalculate and update user's total points"""
-    breakdown = await calculate_user_points(user_id, db)
+async def update_user_points(user_oid: ObjectId, breakdown: PointsBreakdown, db) -> int:
+    """Store a user's recalculated total points"""
+    logger.info(f"Points calculation for user {user_oid}: {breakdown}")
     await db.users.update_one(
-        {"_id": ObjectId(user_id)},
+        {"_id": user_oid},
         {"$set": {"points": breakdown.total_points}}
     )
     return breakdown.total_points
 
 
-@router.get("/me/stats", response_model=UserStats)
-async def get_my_stats(current_user: dict = Depends(get_current_user), db=Depends(get_database)):
-    """Get current user's stats including points, referrals, and content counts"""
-    user_id = str(current_user["_id"])  # Convert ObjectId to string
-    
-    # Get user data
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
+async def fetch_user_stats_data(user_oid: ObjectId, db) -> tuple:
+    """User document (USER_STATS_PROJECTION) and content totals, fetched concurrently; 404 if the user is gone"""
+    user, totals = await asyncio.gather(
+        db.users.find_one({"_id": user_oid}, USER_STATS_PROJECTION),
+        user_content_totals(str(user_oid), db),
+    )
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    
-    # Update points before returning
-    await update_user_points(user_id, db)
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
-    
-    # Count stories
-    stories_count = await db.stories.count_documents({
-        "author_id": user_id,
-        "status": "approved"
-    })
-    
-    # Count videos
-    videos_count = await db.videos.count_documents({
-        "author_id": user_id,
-        "status": "approved"
-    })
-    
-    # Get total likes from all content
-    story_likes = await db.stories.aggregate([
-        {"$match": {"author_id": user_id}},
-        {"$group": {"_id": None, "total": {"$sum": {"$ifNull": ["$likes", 0]}}}}
-    ]).to_list(1)
-    total_story_likes = story_likes[0]["total"] if story_likes else 0
-    
-    video_likes = await db.videos.aggregate([
-        {"$match": {"author_id": user_id}},
-        {"$group": {"_id": None, "total": {"$sum": {"$ifNull": ["$likes", 0]}}}}
-    ]).to_list(1)
-    total_video_likes = video_likes[0]["total"] if video_likes else 0
-    
-    comment_likes = await db.comments.aggregate([
-        {"$match": {"author_id": user_id}},
-        {"$group": {"_id": None, "total": {"$sum": {"$ifNull": ["$likes", 0]}}}}
-    ]).to_list(1)
-    total_comment_likes = comment_likes[0]["total"] if comment_likes else 0
-    
-    shot_likes = await db.shots.aggregate([
-        {"$match": {"author_id": user_id}},
-        {"$group": {"_id": None, "total": {"$sum": {"$ifNull": ["$likes", 0]}}}}
-    ]).to_list(1)
-    total_shot_likes = shot_likes[0]["total"] if shot_likes else 0
-    
-    return UserStats(
+    return user, totals
+
+
+@router.get("/me/stats", response_model=UserStats)
+async def get_my_stats(
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+    db=Depends(get_database)
+):
+    """Get current user's stats including points, referrals, and content counts"""
+    user_oid = current_user["_id"]
+    user_id = str(user_oid)
+    
+    # One user lookup and one aggregation; points are derived from the same totals
+    user, totals = await fetch_user_stats_data(user_oid, db)
+    points = await update_user_points(user_oid, calculate_user_points(totals, user.get("referral_count", 0)), db)
+    stories_count = totals["stories"]["approved"]
+    videos_count = totals["videos"]["approved"]
+    total_story_likes = totals["stories"]["likes"]
+    total_video_likes = totals["videos"]["likes"]
+    total_comment_likes = totals["comments"]["likes"]
+    total_shot_likes = totals["shots"]["likes"]
+    
+    stats = UserStats(
         user_id=user_id,
         username=user.get("username"),
         anonymous_name=user["anonymous_name"],
-        points=user.get("points", 0),
+        points=points,
         referral_code=user.get("referral_code", ""),
         referral_count=user.get("referral_count", 0),
         stories_count=stories_count,
@@ -172,13 +178,17 @@ async def get_my_stats(current_user: dict = Depends(get_current_user), db=Depend
         total_video_likes=total_video_likes,
         total_comment_likes=total_comment_likes
     )
+    
+    if etag_not_modified(request, response, stats.model_dump_json().encode()):
+        return Response(status_code=304, headers=dict(response.headers))
+    return stats
 
 
 @router.get("/me/points", response_model=PointsBreakdown)
 async def get_my_points_breakdown(current_user: dict = Depends(get_current_user), db=Depends(get_database)):
     """Get detailed breakdown of how user earned their points"""
-    user_id = current_user["_id"]
-    return await calculate_user_points(user_id, db)
+    user, totals = await fetch_user_stats_data(current_user["_id"], db)
+    return calculate_user_points(totals, user.get("referral_count", 0))
 
 
 @router.get("/me/referral", response_model=ReferralInfo)
@@ -188,25 +198,17 @@ async def get_my_referral_info(
     db=Depends(get_database)
 ):
     """Get user's referral code and link"""
-    user_id = current_user["_id"]
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
+    user_oid = current_user["_id"]
+    user = await db.users.find_one({"_id": user_oid}, {"referral_code": 1, "referral_count": 1})
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    referral_code = user.get("referral_code")
-    if not referral_code:
-        # Generate referral code if user doesn't have one
-        referral_code = generate_referral_code()
-        await db.users.update_one(
-            {"_id": ObjectId(user_id)},
-            {"$set": {"referral_code": referral_code}}
-        )
+    # Codes are issued at signup; only accounts created before that lack one
+    referral_code = user.get("referral_code") or await assign_referral_code(user_oid, db)
     
     # Use frontend URL for referral link
-    from config import get_settings
-    settings = get_settings()
-    referral_link = f"{settings.frontend_url}/register?ref={referral_code}"
+    referral_link = REFERRAL_LINK_TEMPLATE.format(code=referral_code)
     
     return ReferralInfo(
         referral_code=referral_code,
@@ -217,55 +219,67 @@ async def get_my_referral_info(
 
 @router.get("/leaderboard")
 async def get_leaderboard(
-    limit: int = 50,
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=100),
     current_user: dict = Depends(get_optional_user),
     db=Depends(get_database)
 ):
     """Get top users by points"""
-    users = await db.users.find(
-        {"is_active": True},
-        {"username": 1, "anonymous_name": 1, "points": 1, "referral_count": 1}
-    ).sort("points", -1).limit(limit).to_list(limit)
-    
-    leaderboard = []
-    for idx, user in enumerate(users, 1):
-        leaderboard.append({
-            "rank": idx,
-            "user_id": str(user["_id"]),
-            "anonymous_name": user["anonymous_name"],
-            "username": user.get("username"),
-            "points": user.get("points", 0),
-            "referral_count": user.get("referral_count", 0),
-            "is_current_user": str(user["_id"]) == current_user.get("_id", "") if current_user else False
-        })
+    entries = leaderboard_cache.get(limit)
+    if entries is None:
+        # Rank is computed server-side so the whole board is one round-trip
+        users = await db.users.aggregate([
+            {"$match": {"is_active": True}},
+            {"$sort": {"points": -1}},
+            {"$limit": limit},
+            {"$setWindowFields": {
+                "sortBy": {"points": -1},
+                "output": {"rank": {"$rank": {}}}
+            }},
+            {"$project": {"username": 1, "anonymous_name": 1, "points": 1, "referral_count": 1, "rank": 1}}
+        ]).to_list(limit)
+        
+        entries = [
+            {
+                "rank": user["rank"],
+                "user_id": str(user["_id"]),
+                "anonymous_name": user["anonymous_name"],
+                "username": user.get("username"),
+                "points": user.get("points", 0),
+                "referral_count": user.get("referral_count", 0),
+            }
+            for user in users
+        ]
+        leaderboard_cache[limit] = entries
+    
+    # Cached entries are user-agnostic; the current-user flag is applied per request
+    current_user_id = str(current_user["_id"]) if current_user else None
+    leaderboard = [
+        {**entry, "is_current_user": entry["user_id"] == current_user_id}
+        for entry in entries
+    ]
     
-    return {"leaderboard": leaderboard, "total": len(leaderboard)}
+    payload = {"leaderboard": leaderboard, "total": len(leaderboard)}
+    if etag_not_modified(request, response, orjson.dumps(payload)):
+        return Response(status_code=304, headers=dict(response.headers))
+    return payload
 
 
 @router.get("/me/liked-posts", response_model=UserLikedPosts)
 async def get_my_liked_posts(current_user: dict = Depends(get_current_user), db=Depends(get_database)):
     """Get all posts the user has liked (for AI recommendations)"""
-    user_id = current_user["_id"]
-    
-    # Get stories liked by user
-    liked_stories = await db.stories.find(
-        {"liked_by": user_id},
-        {"_id": 1}
-    ).to_list(None)
+    # liked_by arrays hold string ids
+    user_id = str(current_user["_id"])
+    
+    # Stories, videos and comments liked by user, fetched concurrently
+    liked_stories, liked_videos, liked_comments = await asyncio.gather(
+        db.stories.find({"liked_by": user_id}, {"_id": 1}).to_list(None),
+        db.videos.find({"liked_by": user_id}, {"_id": 1}).to_list(None),
+        db.comments.find({"liked_by": user_id}, {"_id": 1}).to_list(None),
+    )
     story_ids = [str(story["_id"]) for story in liked_stories]
-    
-    # Get videos liked by user
-    liked_videos = await db.videos.find(
-        {"liked_by": user_id},
-        {"_id": 1}
-    ).to_list(None)
     video_ids = [str(video["_id"]) for video in liked_videos]
-    
-    # Get comments liked by user
-    liked_comments = await db.comments.find(
-        {"liked_by": user_id},
-        {"_id": 1}
-    ).to_list(None)
     comment_ids = [str(comment["_id"]) for comment in liked_comments]
     
     return UserLikedPosts(
@@ -285,53 +299,24 @@ async def get_user_stats(
 ):
     """Get public stats for any user"""
     try:
-        user = await db.users.find_one({"_id": ObjectId(user_id)})
+        user_oid = ObjectId(user_id)
     except:
         raise HTTPException(status_code=400, detail="Invalid user ID")
     
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    # Update points
-    await update_user_points(user_id, db)
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
-    
-    # Count stories
-    stories_count = await db.stories.count_documents({
-        "author_id": user_id,
-        "status": "approved"
-    })
-    
-    # Count videos
-    videos_count = await db.videos.count_documents({
-        "author_id": user_id,
-        "status": "approved"
-    })
-    
-    # Get total likes
-    story_likes = await db.stories.aggregate([
-        {"$match": {"author_id": user_id}},
-        {"$group": {"_id": None, "total": {"$sum": "$likes"}}}
-    ]).to_list(1)
-    total_story_likes = story_likes[0]["total"] if story_likes else 0
-    
-    video_likes = await db.videos.aggregate([
-        {"$match": {"author_id": user_id}},
-        {"$group": {"_id": None, "total": {"$sum": "$likes"}}}
-    ]).to_list(1)
-    total_video_likes = video_likes[0]["total"] if video_likes else 0
-    
-    comment_likes = await db.comments.aggregate([
-        {"$match": {"user_id": user_id}},
-        {"$group": {"_id": None, "total": {"$sum": "$likes"}}}
-    ]).to_list(1)
-    total_comment_likes = comment_likes[0]["total"] if comment_likes else 0
+    # One user lookup and one aggregation; points are derived from the same totals
+    user, totals = await fetch_user_stats_data(user_oid, db)
+    points = await update_user_points(user_oid, calculate_user_points(totals, user.get("referral_count", 0)), db)
+    stories_count = totals["stories"]["approved"]
+    videos_count = totals["videos"]["approved"]
+    total_story_likes = totals["stories"]["likes"]
+    total_video_likes = totals["videos"]["likes"]
+    total_comment_likes = totals["comments"]["likes"]
     
     return UserStats(
         user_id=user_id,
         username=user.get("username"),
         anonymous_name=user["anonymous_name"],
-        points=user.get("points", 0),
+        points=points,
         referral_code=user.get("referral_code", ""),
         referral_count=user.get("referral_count", 0),
         stories_count=stories_count,
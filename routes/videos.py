@@ -1,14 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File, Request
+from fastapi.concurrency import run_in_threadpool
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timezone
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import ExecutionTimeout, OperationFailure
 from auth import get_current_user, get_optional_user, get_current_admin
 from config import get_settings
 from s3_storage import s3_storage
+import asyncio
+import base64
+import json
 import uuid
 import os
+import re
+import shutil
 import logging
 from pathlib import Path
 from models import (
@@ -26,16 +34,80 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/videos", tags=["videos"])
 settings = get_settings()
 limiter = Limiter(key_func=get_remote_address)
+_UTC = timezone.utc
+
+# Fields video_helper reads; keeps the liked_by array off the wire for list endpoints
+VIDEO_FEED_PROJECTION = {
+    "video_url": 1,
+    "caption": 1,
+    "tags": 1,
+    "mature_content": 1,
+    "author_id": 1,
+    "author_anonymous_name": 1,
+    "likes": 1,
+    "views": 1,
+    "status": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "published_at": 1,
+    "rejection_reason": 1,
+}
 
 # Ensure upload directory exists (only for local storage)
 if not settings.use_s3:
     Path(settings.video_upload_dir).mkdir(parents=True, exist_ok=True)
 
 
-def allowed_video_file(filename: str) -> bool:
-    """Check if video file extension is allowed"""
-    allowed = settings.allowed_video_extensions.split(',')
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed
+OBJECT_ID_RE = re.compile(r"[0-9a-fA-F]{24}")
+
+
+def valid_video_oid(video_id: str) -> ObjectId:
+    """Path dependency: parse the video_id path parameter, rejecting malformed IDs with a 400"""
+    # fullmatch: "$" would also accept a trailing newline that ObjectId() rejects
+    if not OBJECT_ID_RE.fullmatch(video_id):
+        raise HTTPException(status_code=400, detail="Invalid video ID")
+    return ObjectId(video_id)
+
+
+def stored_utc_now() -> datetime:
+    """Current UTC time as MongoDB stores and returns it: naive, truncated to milliseconds"""
+    now = datetime.now(_UTC)
+    return now.replace(tzinfo=None, microsecond=now.microsecond // 1000 * 1000)
+
+
+def normalize_tags(tags: list) -> list:
+    """Lowercase and trim tags so tag search can use exact matches on the tags index"""
+    return [tag.strip().lower() for tag in tags if tag.strip()]
+
+
+ALLOWED_VIDEO_EXTENSIONS = frozenset(
+    ext.strip().lower() for ext in settings.allowed_video_extensions.split(',') if ext.strip()
+)
+
+
+def video_file_extension(filename: str) -> str:
+    """Lowercased file extension without the dot ('' if there is none)"""
+    return os.path.splitext(filename)[1][1:].lower()
+
+
+class UploadTooLarge(Exception):
+    """Raised mid-stream when an upload passes the size limit"""
+
+
+class SizeLimitedReader:
+    """File-like wrapper that counts bytes as they are read and stops past `limit`"""
+    
+    def __init__(self, fileobj, limit: int):
+        self.fileobj = fileobj
+        self.limit = limit
+        self.bytes_read = 0
+    
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.fileobj.read(size)
+        self.bytes_read += len(chunk)
+        if self.bytes_read > self.limit:
+            raise UploadTooLarge()
+        return chunk
 
 
 @router.post("/upload-video", response_model=dict)
@@ -46,38 +118,38 @@ async def upload_video_file(
     current_user: dict = Depends(get_current_user),
 ):
     """Upload a video file to S3 or local storage"""
-    if not allowed_video_file(file.filename):
+    file_extension = video_file_extension(file.filename)
+    if file_extension not in ALLOWED_VIDEO_EXTENSIONS:
         raise HTTPException(
             status_code=400,
             detail=f"File type not allowed. Allowed types: {settings.allowed_video_extensions}"
         )
     
-    # Check file size
-    file.file.seek(0, 2)
-    file_size = file.file.tell()
-    file.file.seek(0)
-    
-    if file_size > settings.max_video_size:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size: {settings.max_video_size / 1024 / 1024}MB"
-        )
+    too_large = HTTPException(
+        status_code=400,
+        detail=f"File too large. Maximum size: {settings.max_video_size / 1024 / 1024}MB"
+    )
     
-    # Read file content
-    file_content = await file.read()
+    # Check file size from the parsed upload; unknown sizes are enforced while streaming
+    if file.size is not None and file.size > settings.max_video_size:
+        raise too_large
+    source = SizeLimitedReader(file.file, settings.max_video_size)
     
-    # Upload based on configuration
+    # Upload based on configuration, streaming from the spooled file instead of reading it into memory
     if settings.use_s3:
         try:
             # Upload to S3 (returns S3 key, not URL)
-            s3_key = s3_storage.upload_file(
-                file_content=file_content,
+            s3_key = await run_in_threadpool(
+                s3_storage.upload_fileobj,
+                source,
                 filename=file.filename,
                 content_type=file.content_type or "video/mp4",
                 folder="videos"
             )
             # Store S3 key, not URL (for security)
             return {"url": f"s3://{s3_key}"}
+        except UploadTooLarge:
+            raise too_large
         except Exception as e:
             raise HTTPException(
                 status_code=500,
@@ -85,29 +157,52 @@ async def upload_video_file(
             )
     else:
         # Local storage (development)
-        file_extension = file.filename.rsplit('.', 1)[1].lower()
         unique_filename = f"{uuid.uuid4()}.{file_extension}"
         file_path = os.path.join(settings.video_upload_dir, unique_filename)
         
         # Save file locally
-        with open(file_path, "wb") as buffer:
-            buffer.write(file_content)
+        try:
+            with open(file_path, "wb") as buffer:
+                await run_in_threadpool(shutil.copyfileobj, source, buffer)
+        except UploadTooLarge:
+            os.remove(file_path)
+            raise too_large
         
         return {"url": f"/uploads/videos/{unique_filename}"}
 
 
-def video_helper(video: dict, user_liked_videos: list = []) -> dict:
-    """Convert MongoDB video document to response format"""
+async def presign_video_urls(videos: list) -> dict:
+    """Pre-sign every S3-backed video URL of a page in one pass (off the event loop), keyed by S3 key"""
+    if not settings.use_s3:
+        return {}
+    
+    s3_keys = [
+        video["video_url"].replace("s3://", "")
+        for video in videos
+        if video["video_url"].startswith("s3://")
+    ]
+    try:
+        return await run_in_threadpool(s3_storage.batch_presigned_urls, s3_keys, expiration=86400)  # 24 hours
+    except Exception as e:
+        logger.error(f"Failed to generate pre-signed URLs for videos: {e}")
+        return {}
+
+
+async def fetch_user_liked_videos(db, current_user) -> list:
+    """IDs of the videos the caller has liked (empty for anonymous callers)"""
+    if not current_user:
+        return []
+    user_likes = await db.user_liked_posts.find_one({"user_id": str(current_user["_id"])})
+    return user_likes.get("liked_videos", []) if user_likes else []
+
+
+def video_helper(video: dict, user_liked_videos: list, presigned_urls: dict) -> dict:
+    """Convert MongoDB video document to response format (presigned_urls from presign_video_urls)"""
     video_url = video["video_url"]
     
     # Convert S3 key to pre-signed URL if needed
     if settings.use_s3 and video_url.startswith("s3://"):
-        s3_key = video_url.replace("s3://", "")
-        try:
-            video_url = s3_storage.get_presigned_url(s3_key, expiration=86400)  # 24 hours
-        except Exception as e:
-            logger.error(f"Failed to generate pre-signed URL for video: {e}")
-            video_url = ""  # Fallback to empty string
+        video_url = presigned_urls.get(video_url.replace("s3://", ""), "")  # Empty if signing failed
     
     return {
         "id": str(video["_id"]),
@@ -128,6 +223,75 @@ def video_helper(video: dict, user_liked_videos: list = []) -> dict:
     }
 
 
+async def fetch_video_page(db, query: dict, skip: int, limit: int, with_total: bool = True) -> tuple:
+    """Fetch one newest-first page of videos, plus the total match count if asked"""
+    # Index-backed sort/limit on (status, created_at, _id); the count runs alongside it
+    cursor = db.videos.find(query, VIDEO_FEED_PROJECTION).sort([("created_at", -1), ("_id", -1)]).skip(skip).limit(limit)
+    if not with_total:
+        return await cursor.to_list(length=limit), None
+    
+    videos, total = await asyncio.gather(
+        cursor.to_list(length=limit),
+        db.videos.count_documents(query),
+    )
+    return videos, total
+
+
+async def count_videos_bounded(db, query: dict) -> Optional[int]:
+    """Count matching videos, giving up (None) rather than stalling the page on a slow count"""
+    try:
+        return await db.videos.count_documents(query, maxTimeMS=500)
+    except ExecutionTimeout:
+        return None
+
+
+def encode_feed_cursor(video: dict) -> str:
+    """Opaque keyset cursor pointing just past the given video"""
+    payload = json.dumps({"created_at": video["created_at"].isoformat(), "id": str(video["_id"])})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_feed_cursor(cursor: str) -> tuple:
+    """Decode a keyset cursor into its (created_at, ObjectId) position"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(payload["created_at"]), ObjectId(payload["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def fetch_feed_page(
+    db,
+    query: dict,
+    page: int,
+    page_size: int,
+    position: Optional[tuple] = None,
+    bounded_total: bool = False,
+) -> tuple:
+    """One feed page: keyset page after a cursor position, offset page for `page`, or the first page with its total"""
+    if position:
+        created_at, last_id = position
+        page_query = {
+            **query,
+            "$or": [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": last_id}},
+            ]
+        }
+        cursor = db.videos.find(page_query, VIDEO_FEED_PROJECTION).sort([("created_at", -1), ("_id", -1)]).limit(page_size)
+        return await cursor.to_list(length=page_size), None
+    if page > 1:
+        # Clients reuse the total from the first page
+        return await fetch_video_page(db, query, (page - 1) * page_size, page_size, with_total=False)
+    if bounded_total:
+        (videos, _), total = await asyncio.gather(
+            fetch_video_page(db, query, 0, page_size, with_total=False),
+            count_videos_bounded(db, query),
+        )
+        return videos, total
+    return await fetch_video_page(db, query, 0, page_size)
+
+
 @router.post("/", response_model=VideoResponse)
 async def create_video(
     video_data: VideoCreate,
@@ -135,12 +299,13 @@ async def create_video(
     db = Depends(get_database),
 ):
     """Create a new video"""
-    now = datetime.utcnow()
+    # Same value the stored document returns on later reads
+    now = stored_utc_now()
     
     video = {
         "video_url": video_data.video_url,
         "caption": video_data.caption,
-        "tags": video_data.tags,
+        "tags": normalize_tags(video_data.tags),
         "mature_content": video_data.mature_content,
         "author_id": str(current_user["_id"]),
         "author_anonymous_name": current_user["anonymous_name"],
@@ -161,103 +326,114 @@ async def create_video(
         {"$inc": {"points": 1}}
     )
     
-    return VideoResponse(**video_helper(video))
+    return video_helper(video, [], await presign_video_urls([video]))
 
 
 @router.get("/", response_model=VideoListResponse)
 async def get_videos(
     page: int = 1,
     page_size: int = 20,
+    after: Optional[str] = None,
     search: Optional[str] = None,
     current_user: Optional[dict] = Depends(get_optional_user),
     db = Depends(get_database),
 ):
-    """Get videos feed"""
-    skip = (page - 1) * page_size
+    """Get videos feed (pass next_cursor as `after` to page forward; `page` is kept for older clients)
     
+    `total` is only computed for the first page and is null afterwards, so
+    clients should keep the value from the first response.
+    """
     # Base query - only show approved videos for public feed
     query = {"status": StoryStatus.APPROVED}
+    position = decode_feed_cursor(after) if after else None
     
     if search:
-        query["$or"] = [
-            {"caption": {"$regex": search, "$options": "i"}},
-            {"tags": {"$regex": search, "$options": "i"}},
-        ]
-    
-    cursor = db.videos.find(query).sort("created_at", -1).skip(skip).limit(page_size)
-    videos = await cursor.to_list(length=page_size)
+        # Served by the caption/tags text index instead of a regex scan. $text can't sit inside
+        # an $or, so the exact tag match runs alongside it and is used only if $text finds nothing
+        text_query = {**query, "$text": {"$search": search}}
+        tag_query = {**query, "tags": search.strip().lower()}
+        text_match, text_page, tag_page = await asyncio.gather(
+            db.videos.find_one(text_query, {"_id": 1}),
+            fetch_feed_page(db, text_query, page, page_size, position, bounded_total=True),
+            fetch_feed_page(db, tag_query, page, page_size, position, bounded_total=True),
+        )
+        videos, total = text_page if text_match else tag_page
+    else:
+        videos, total = await fetch_feed_page(db, query, page, page_size, position)
     
-    total = await db.videos.count_documents(query)
+    next_cursor = encode_feed_cursor(videos[-1]) if len(videos) == page_size else None
     
-    # Get user's liked videos if authenticated
-    user_liked_videos = []
-    if current_user:
-        user_likes = await db.user_liked_posts.find_one({"user_id": str(current_user["_id"])})
-        user_liked_videos = user_likes.get("liked_videos", []) if user_likes else []
+    # Liked-state lookup and URL signing don't depend on each other, so overlap them
+    user_liked_videos, presigned_urls = await asyncio.gather(
+        fetch_user_liked_videos(db, current_user),
+        presign_video_urls(videos),
+    )
     
-    video_responses = [VideoResponse(**video_helper(video, user_liked_videos)) for video in videos]
+    # Plain dicts: FastAPI validates them once against the response_model
+    video_responses = [video_helper(video, user_liked_videos, presigned_urls) for video in videos]
     
-    return VideoListResponse(videos=video_responses, total=total)
+    return {"videos": video_responses, "total": total, "next_cursor": next_cursor}
 
 
 @router.get("/my-videos", response_model=VideoListResponse)
 async def get_my_videos(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=100),
     current_user: dict = Depends(get_current_user),
     db = Depends(get_database),
 ):
     """Get current user's videos"""
-    videos = await db.videos.find({"author_id": str(current_user["_id"])}).sort("created_at", -1).to_list(length=None)
+    skip = (page - 1) * page_size
+    videos, total = await fetch_video_page(
+        db, {"author_id": str(current_user["_id"])}, skip, page_size
+    )
     
-    total = len(videos)
     # User's own videos - no need to check liked status
-    video_responses = [VideoResponse(**video_helper(video, [])) for video in videos]
+    presigned_urls = await presign_video_urls(videos)
+    video_responses = [video_helper(video, [], presigned_urls) for video in videos]
     
-    return VideoListResponse(videos=video_responses, total=total)
+    return {"videos": video_responses, "total": total}
 
 
 @router.get("/{video_id}", response_model=VideoResponse)
 async def get_video(
-    video_id: str,
+    video_oid: ObjectId = Depends(valid_video_oid),
+    include_liked: bool = False,
     current_user: Optional[User] = Depends(get_optional_user),
     db = Depends(get_database),
 ):
     """Get a specific video by ID"""
-    if not ObjectId.is_valid(video_id):
-        raise HTTPException(status_code=400, detail="Invalid video ID")
-    
-    video = await db.videos.find_one({"_id": ObjectId(video_id)})
+    # Count the view and fetch the updated document in one round-trip
+    video = await db.videos.find_one_and_update(
+        {"_id": video_oid},
+        {"$inc": {"views": 1}},
+        return_document=ReturnDocument.AFTER
+    )
     
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
     
-    # Increment view count
-    await db.videos.update_one(
-        {"_id": ObjectId(video_id)},
-        {"$inc": {"views": 1}}
-    )
-    video["views"] = video.get("views", 0) + 1
-    
-    # Get user's liked videos if authenticated
-    user_liked_videos = []
-    if current_user:
-        user_likes = await db.user_liked_posts.find_one({"user_id": str(current_user["_id"])})
-        user_liked_videos = user_likes.get("liked_videos", []) if user_likes else []
+    if include_liked and current_user:
+        user_liked_videos = [str(video["_id"])] if str(current_user["_id"]) in video.get("liked_by", []) else []
+        presigned_urls = await presign_video_urls([video])
+    else:
+        user_liked_videos, presigned_urls = await asyncio.gather(
+            fetch_user_liked_videos(db, current_user),
+            presign_video_urls([video]),
+        )
     
-    return VideoResponse(**video_helper(video, user_liked_videos))
+    return video_helper(video, user_liked_videos, presigned_urls)
 
 
 @router.put("/{video_id}", response_model=VideoResponse)
 async def update_video(
-    video_id: str,
     video_data: VideoUpdate,
+    video_oid: ObjectId = Depends(valid_video_oid),
     current_user: dict = Depends(get_current_user),
     db = Depends(get_database),
 ):
     """Update a video"""
-    if not ObjectId.is_valid(video_id):
-        raise HTTPException(status_code=400, detail="Invalid video ID")
-    
-    video = await db.videos.find_one({"_id": ObjectId(video_id)})
+    video = await db.videos.find_one({"_id": video_oid})
     
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
@@ -272,29 +448,27 @@ async def update_video(
     if video_data.caption is not None:
         update_data["caption"] = video_data.caption
     if video_data.tags is not None:
-        update_data["tags"] = video_data.tags
+        update_data["tags"] = normalize_tags(video_data.tags)
     if video_data.mature_content is not None:
         update_data["mature_content"] = video_data.mature_content
     
-    update_data["updated_at"] = datetime.utcnow()
+    update_data["updated_at"] = stored_utc_now()
     
-    await db.videos.update_one({"_id": ObjectId(video_id)}, {"$set": update_data})
+    await db.videos.update_one({"_id": video_oid}, {"$set": update_data})
     
-    updated_video = await db.videos.find_one({"_id": ObjectId(video_id)})
-    return VideoResponse(**video_helper(updated_video))
+    updated_video = await db.videos.find_one({"_id": video_oid})
+    return video_helper(updated_video, [], await presign_video_urls([updated_video]))
 
 
 @router.delete("/{video_id}")
 async def delete_video(
     video_id: str,
+    video_oid: ObjectId = Depends(valid_video_oid),
     current_user: dict = Depends(get_current_user),
     db = Depends(get_database),
 ):
     """Delete a video"""
-    if not ObjectId.is_valid(video_id):
-        raise HTTPException(status_code=400, detail="Invalid video ID")
-    
-    video = await db.videos.find_one({"_id": ObjectId(video_id)})
+    video = await db.videos.find_one({"_id": video_oid})
     
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
@@ -305,67 +479,69 @@ async def delete_video(
             status_code=403, detail="You can only delete your own videos"
         )
     
-    # Delete associated comments
-    await db.comments.delete_many({"video_id": video_id})
-    
-    # Delete the video
-    await db.videos.delete_one({"_id": ObjectId(video_id)})
+    # Delete associated comments and the video together so no orphaned comments are left
+    try:
+        async with await db.client.start_session() as session:
+            async with session.start_transaction():
+                await db.comments.delete_many({"video_id": video_id}, session=session)
+                await db.videos.delete_one({"_id": video_oid}, session=session)
+    except OperationFailure as e:
+        # Standalone servers (code 20, IllegalOperation) have no transactions; delete concurrently instead
+        if e.code != 20:
+            raise
+        await asyncio.gather(
+            db.comments.delete_many({"video_id": video_id}),
+            db.videos.delete_one({"_id": video_oid}),
+        )
     
     return {"message": "Video deleted successfully"}
 
 
 @router.post("/{video_id}/like")
 async def toggle_video_like(
-    video_id: str,
+    video_oid: ObjectId = Depends(valid_video_oid),
     current_user: dict = Depends(get_current_user),
     db = Depends(get_database),
 ):
     """Like or unlike a video"""
-    try:
-        video_obj_id = ObjectId(video_id)
-    except:
-        raise HTTPException(status_code=400, detail="Invalid video ID")
+    user_id = str(current_user["_id"])
+    liked_by = {"$ifNull": ["$liked_by", []]}
+    already_liked = {"$in": [user_id, liked_by]}
+    
+    # Toggle membership and the counter atomically in one pipeline update
+    video = await db.videos.find_one_and_update(
+        {"_id": video_oid},
+        [{"$set": {
+            "liked_by": {"$cond": [
+                already_liked,
+                {"$filter": {"input": liked_by, "cond": {"$ne": ["$$this", user_id]}}},
+                {"$concatArrays": [liked_by, [user_id]]}
+            ]},
+            "likes": {"$cond": [
+                already_liked,
+                {"$max": [{"$subtract": [{"$ifNull": ["$likes", 0]}, 1]}, 0]},
+                {"$add": [{"$ifNull": ["$likes", 0]}, 1]}
+            ]}
+        }}],
+        # Only the caller's own liked_by entry comes back
+        projection={"likes": 1, "author_id": 1, "liked_by": {"$elemMatch": {"$eq": user_id}}},
+        return_document=ReturnDocument.AFTER
+    )
     
-    video = await db.videos.find_one({"_id": video_obj_id})
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
     
-    user_id = str(current_user["_id"])
-    liked_by = video.get("liked_by", [])
-    
-    # Check if user already liked this video
-    if user_id in liked_by:
-        # Unlike: remove user from liked_by array
-        await db.videos.update_one(
-            {"_id": video_obj_id},
-            {
-                "$pull": {"liked_by": user_id},
-                "$inc": {"likes": -1}
-            }
-        )
-        liked = False
-        new_likes = video.get("likes", 0) - 1
-        points_earned = 0
-    else:
-        # Like: add user to liked_by array
-        await db.videos.update_one(
-            {"_id": video_obj_id},
-            {
-                "$addToSet": {"liked_by": user_id},
-                "$inc": {"likes": 1}
-            }
+    liked = bool(video.get("liked_by"))
+    new_likes = video.get("likes", 0)
+    
+    # Award points to video author if they reach 1000 likes milestone
+    points_earned = 0
+    if liked and new_likes > 0 and new_likes % 1000 == 0:
+        await db.users.update_one(
+            {"_id": ObjectId(video["author_id"])},
+            {"$inc": {"points": 1}}
         )
-        liked = True
-        new_likes = video.get("likes", 0) + 1
-        
-        # Award points to video author if they reach 1000 likes milestone
-        points_earned = 0
-        if new_likes > 0 and new_likes % 1000 == 0:
-            await db.users.update_one(
-                {"_id": ObjectId(video["author_id"])},
-                {"$inc": {"points": 1}}
-            )
-            points_earned = 1
+        points_earned = 1
     
     return {
         "liked": liked,
@@ -376,38 +552,33 @@ async def toggle_video_like(
 
 @router.get("/{video_id}/liked")
 async def check_if_liked(
-    video_id: str,
+    video_oid: ObjectId = Depends(valid_video_oid),
     current_user: dict = Depends(get_current_user),
     db = Depends(get_database),
 ):
     """Check if current user has liked a video"""
-    try:
-        video = await db.videos.find_one({"_id": ObjectId(video_id)})
-    except:
-        raise HTTPException(status_code=400, detail="Invalid video ID")
+    user_id = str(current_user["_id"])
+    # Only the matching liked_by entry (if any) comes back, not the whole array
+    video = await db.videos.find_one(
+        {"_id": video_oid},
+        {"_id": 1, "liked_by": {"$elemMatch": {"$eq": user_id}}}
+    )
     
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
     
-    user_id = str(current_user["_id"])
-    liked_by = video.get("liked_by", [])
-    
-    return {"liked": user_id in liked_by}
+    return {"liked": bool(video.get("liked_by"))}
 
 
 @router.get("/{video_id}/share")
 async def get_video_share_link(
     video_id: str,
     request: Request,
+    video_oid: ObjectId = Depends(valid_video_oid),
     db = Depends(get_database),
 ):
     """Get shareable link for a video"""
-    try:
-        video_obj_id = ObjectId(video_id)
-    except:
-        raise HTTPException(status_code=400, detail="Invalid video ID")
-    
-    video = await db.videos.find_one({"_id": video_obj_id})
+    video = await db.videos.find_one({"_id": video_oid})
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
     
@@ -1,26 +1,65 @@
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from config import get_settings
+from cachetools import TTLCache
+from functools import cached_property
+import threading
 import uuid
 import logging
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+VIDEO_CONTENT_TYPES = {
+    'mp4': 'video/mp4',
+    'webm': 'video/webm',
+    'ogg': 'video/ogg',
+    'mov': 'video/quicktime',
+    'avi': 'video/x-msvideo'
+}
+
+# Pre-signed URLs are reused for this long; S3 is asked for that much extra validity
+PRESIGNED_URL_CACHE_TTL = 3600
+
+# Large uploads go up in 8MB parts, several at a time, streamed from the spooled upload file
+UPLOAD_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=8,
+    use_threads=True
+)
+
 
 class S3Storage:
     def __init__(self):
-        if settings.use_s3:
-            self.s3_client = boto3.client(
-                's3',
-                aws_access_key_id=settings.aws_access_key_id,
-                aws_secret_access_key=settings.aws_secret_access_key,
-                region_name=settings.aws_region
+        self.bucket_name = settings.s3_bucket_name if settings.use_s3 else None
+        
+        # (s3_key, expiration) -> URL; shared across threadpool workers, hence the lock
+        self._url_cache = TTLCache(maxsize=10_000, ttl=PRESIGNED_URL_CACHE_TTL)
+        self._url_cache_lock = threading.Lock()
+    
+    @cached_property
+    def s3_client(self):
+        """Shared S3 client, built on first use so startup doesn't pay for endpoint/credential resolution"""
+        if not settings.use_s3:
+            return None
+        
+        session = boto3.session.Session(
+            aws_access_key_id=settings.aws_access_key_id,
+            aws_secret_access_key=settings.aws_secret_access_key,
+            region_name=settings.aws_region
+        )
+        # Enough pooled connections for concurrent uploads/signing from the threadpool
+        return session.client(
+            's3',
+            config=Config(
+                max_pool_connections=50,
+                retries={"max_attempts": 3, "mode": "adaptive"},
+                tcp_keepalive=True
             )
-            self.bucket_name = settings.s3_bucket_name
-        else:
-            self.s3_client = None
-            self.bucket_name = None
+        )
     
     def upload_file(self, file_content: bytes, filename: str, content_type: str, folder: str = "images") -> str:
         """
@@ -51,45 +90,98 @@ class S3Storage:
             logger.error(f"Error uploading to S3: {e}")
             raise Exception(f"Failed to upload file to S3: {str(e)}")
     
-    def get_presigned_url(self, s3_key: str, expiration: int = 3600) -> str:
+    def upload_fileobj(self, fileobj, filename: str, content_type: str, folder: str = "videos") -> str:
         """
-        Generate a pre-signed URL for secure file access
-        Default expiration: 1 hour (3600 seconds)
+        Stream a file-like object to S3 (private), using multipart upload for large files
+        Returns the S3 key (filename) for later retrieval
         """
         if not settings.use_s3:
             raise ValueError("S3 storage is not enabled")
         
         try:
-            # Add ResponseContentType for proper video streaming
-            params = {
-                'Bucket': self.bucket_name,
-                'Key': s3_key
-            }
+            # Generate unique filename
+            file_extension = filename.rsplit('.', 1)[1].lower() if '.' in filename else 'mp4'
+            unique_filename = f"{folder}/{uuid.uuid4()}.{file_extension}"
             
-            # Set proper content type for videos
-            if s3_key.startswith('videos/'):
-                # Get file extension
-                ext = s3_key.split('.')[-1].lower()
-                content_types = {
-                    'mp4': 'video/mp4',
-                    'webm': 'video/webm',
-                    'ogg': 'video/ogg',
-                    'mov': 'video/quicktime',
-                    'avi': 'video/x-msvideo'
-                }
-                if ext in content_types:
-                    params['ResponseContentType'] = content_types[ext]
+            # Upload to S3 (private - no ACL)
+            self.s3_client.upload_fileobj(
+                fileobj,
+                self.bucket_name,
+                unique_filename,
+                ExtraArgs={"ContentType": content_type},
+                Config=UPLOAD_TRANSFER_CONFIG
+            )
             
+            # Return S3 key (not a URL)
+            return unique_filename
+        
+        except ClientError as e:
+            logger.error(f"Error uploading to S3: {e}")
+            raise Exception(f"Failed to upload file to S3: {str(e)}")
+    
+    def _presigned_url_params(self, s3_key: str) -> dict:
+        """Build get_object params for a key, with a streaming-friendly content type for videos"""
+        # Add ResponseContentType for proper video streaming
+        params = {
+            'Bucket': self.bucket_name,
+            'Key': s3_key
+        }
+        
+        # Set proper content type for videos
+        if s3_key.startswith('videos/'):
+            # Get file extension
+            ext = s3_key.split('.')[-1].lower()
+            if ext in VIDEO_CONTENT_TYPES:
+                params['ResponseContentType'] = VIDEO_CONTENT_TYPES[ext]
+        
+        return params
+    
+    def _signed_url(self, s3_key: str, expiration: int) -> str:
+        """Return a cached pre-signed URL valid for at least `expiration` seconds, signing on a miss"""
+        cache_key = (s3_key, expiration)
+        with self._url_cache_lock:
+            url = self._url_cache.get(cache_key)
+        if url is None:
+            # Cached copies are served for up to the cache TTL, so sign for that much longer
             url = self.s3_client.generate_presigned_url(
                 'get_object',
-                Params=params,
-                ExpiresIn=expiration
+                Params=self._presigned_url_params(s3_key),
+                ExpiresIn=expiration + PRESIGNED_URL_CACHE_TTL
             )
-            return url
+            with self._url_cache_lock:
+                self._url_cache[cache_key] = url
+        return url
+    
+    def get_presigned_url(self, s3_key: str, expiration: int = 3600) -> str:
+        """
+        Generate a pre-signed URL for secure file access
+        Default expiration: 1 hour (3600 seconds)
+        """
+        if not settings.use_s3:
+            raise ValueError("S3 storage is not enabled")
+        
+        try:
+            return self._signed_url(s3_key, expiration)
         except ClientError as e:
             logger.error(f"Error generating pre-signed URL: {e}")
             raise Exception(f"Failed to generate pre-signed URL: {str(e)}")
     
+    def batch_presigned_urls(self, s3_keys: list, expiration: int = 3600) -> dict:
+        """
+        Generate pre-signed URLs for many keys in one pass
+        Returns {s3_key: url}; duplicate keys are signed once, failed keys are left out
+        """
+        if not settings.use_s3:
+            raise ValueError("S3 storage is not enabled")
+        
+        urls = {}
+        for s3_key in dict.fromkeys(s3_keys):
+            try:
+                urls[s3_key] = self._signed_url(s3_key, expiration)
+            except ClientError as e:
+                logger.error(f"Error generating pre-signed URL for {s3_key}: {e}")
+        return urls
+    
     def delete_file(self, s3_key: str) -> bool:
         """
         Delete file from S3 bucket using S3 key
@@ -97,6 +189,11 @@ class S3Storage:
         if not settings.use_s3:
             return False
         
+        # Stop handing out URLs for the deleted object
+        with self._url_cache_lock:
+            for cache_key in [key for key in self._url_cache if key[0] == s3_key]:
+                self._url_cache.pop(cache_key, None)
+        
         try:
             self.s3_client.delete_object(
                 Bucket=self.bucket_name,
@@ -0,0 +1,265 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+import httpx
+import orjson
+import pytest
+import pytest_asyncio
+from pytest_asyncio import is_async_test
+from blockbuster import BlockBuster
+from httpx import AsyncClient, ASGITransport, MockTransport
+from mongomock_motor import AsyncMongoMockClient
+from passlib.context import CryptContext
+import auth
+from auth import create_access_token, create_refresh_token
+from config import get_settings
+from database import db as mongo, get_database
+from models import StoryStatus, UserRole
+from main import app
+
+try:
+    import uvloop
+except ImportError:  # not available on Windows
+    uvloop = None
+
+settings = get_settings()
+
+# In-process mock MongoDB shared by the whole run: no server needed and no network/disk I/O per query
+MONGO_CLIENT = AsyncMongoMockClient()
+# One database per pytest-xdist worker so parallel workers never share collections
+TEST_DATABASE = MONGO_CLIENT[f"{settings.database_name}_test_{os.environ.get('PYTEST_XDIST_WORKER', 'gw0')}"]
+
+# Users created straight in the database with pre-minted tokens (no register/login round-trips)
+SEEDED_USERNAMES = ["test_session_user", "test_user7"]
+
+
+# Canned bodies served by smoke_client under --smoke, for tests that only check the status contract
+SMOKE_RESPONSES = {
+    "/api/auth/logout": {"message": "Successfully logged out"},
+    "/api/stories/feed": {"stories": [], "total": 0},
+}
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--smoke",
+        action="store_true",
+        help="serve smoke_client tests from canned responses instead of the app"
+    )
+
+
+def pytest_collection_modifyitems(items):
+    # One loop for the whole run: tests share it with the session fixtures (client, Motor pool)
+    session_loop = pytest.mark.asyncio(loop_scope="session")
+    for item in items:
+        if is_async_test(item):
+            item.add_marker(session_loop, append=False)
+
+
+def smoke_response(request: httpx.Request) -> httpx.Response:
+    body = SMOKE_RESPONSES.get(request.url.path)
+    if body is None:
+        return httpx.Response(404, json={"detail": "No canned smoke response"})
+    return httpx.Response(200, json=body)
+
+
+def build_user_doc(username: str, hashed_password: str, role: UserRole = UserRole.USER) -> dict:
+    """User document shaped like the one /api/auth/register inserts"""
+    return {
+        "username": username,
+        "email": None,
+        "hashed_password": hashed_password,
+        "anonymous_name": f"Seeded_{username}",
+        "role": role,
+        "created_at": datetime.utcnow(),
+        "is_active": True,
+        "points": 0,
+        "referred_by": None,
+        "referral_count": 0
+    }
+
+
+def mint_tokens(username: str, role: UserRole = UserRole.USER) -> dict:
+    """Access/refresh JWTs for a user, signed in-process instead of via /api/auth/login"""
+    return {
+        "access": create_access_token(data={"sub": username, "role": role}),
+        "refresh": create_refresh_token(data={"sub": username, "role": role}),
+    }
+
+
+def build_refresh_token_doc(username: str, refresh_token: str) -> dict:
+    # Authenticated routes require a live refresh token per user
+    now = datetime.utcnow()
+    return {
+        "username": username,
+        "token": refresh_token,
+        "created_at": now,
+        "last_activity": now,
+        "expires_at": now + timedelta(days=settings.refresh_token_expire_days)
+    }
+
+
+@pytest.fixture(scope="session")
+def event_loop_policy():
+    if sys.platform.startswith("win"):
+        return asyncio.WindowsSelectorEventLoopPolicy()
+    if uvloop is not None:
+        # libuv-backed loop (installed with uvicorn[standard]): faster ASGI round-trips
+        return uvloop.EventLoopPolicy()
+    return asyncio.DefaultEventLoopPolicy()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def fast_password_hashing():
+    # Minimum bcrypt cost: hashes stay real bcrypt (and still verify production hashes), just cheap
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(auth, "pwd_context", CryptContext(schemes=["bcrypt"], bcrypt__rounds=4, deprecated="auto"))
+        yield
+
+
+@pytest_asyncio.fixture(scope="session")
+async def client(test_db):
+    # One client (and ASGI transport) for the whole run instead of one per test
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+
+
+@pytest_asyncio.fixture(scope="session")
+async def jpost(client: AsyncClient):
+    """`await jpost(url, obj, **kwargs)`: POST obj as a JSON body encoded with orjson instead of stdlib json"""
+    async def _post(url: str, obj, **kwargs) -> httpx.Response:
+        headers = {"Content-Type": "application/json", **kwargs.pop("headers", {})}
+        return await client.post(url, content=orjson.dumps(obj), headers=headers, **kwargs)
+    
+    return _post
+
+
+@pytest_asyncio.fixture(scope="session")
+async def smoke_client(request, client: AsyncClient):
+    """The real client by default; with --smoke, a MockTransport client that skips the app entirely"""
+    if not request.config.getoption("--smoke"):
+        yield client
+        return
+    async with AsyncClient(transport=MockTransport(smoke_response), base_url="http://test") as ac:
+        yield ac
+
+
+@pytest.fixture(autouse=True)
+def no_blocking_calls():
+    # Fail any test whose request path makes a blocking call (sync I/O, sleep) on the event loop
+    blockbuster = BlockBuster()
+    # The app's file log handlers write synchronously by design; everything else must not block
+    for function in blockbuster.functions.values():
+        function.can_block_in("logging/handlers.py", "emit").can_block_in("logging/__init__.py", "emit")
+    blockbuster.activate()
+    yield
+    blockbuster.deactivate()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def test_db():
+    mongo.client = MONGO_CLIENT
+    app.dependency_overrides[get_database] = lambda: TEST_DATABASE
+    yield TEST_DATABASE
+    # Cleanup after the run: one metadata op instead of per-collection scans
+    app.dependency_overrides.pop(get_database, None)
+    await MONGO_CLIENT.drop_database(TEST_DATABASE.name)
+    mongo.client = None
+
+
+@pytest_asyncio.fixture(scope="session", autouse=True)
+async def indexes(test_db):
+    # Same lookup/uniqueness indexes the app creates on startup, built once before any test
+    await test_db.users.create_index("username", unique=True)
+    await test_db.stories.create_index("status")
+    await test_db.refresh_tokens.create_index("token", unique=True)
+
+
+@pytest_asyncio.fixture(scope="session")
+async def seeded_users(test_db):
+    """Insert the seeded users in one batch and mint their tokens: {username: {"access", "refresh"}}"""
+    hashed_password = auth.get_password_hash("testpass123")
+    tokens = {username: mint_tokens(username) for username in SEEDED_USERNAMES}
+    # The two batches are independent, so write them concurrently
+    await asyncio.gather(
+        test_db.users.insert_many([
+            build_user_doc(username, hashed_password) for username in SEEDED_USERNAMES
+        ]),
+        test_db.refresh_tokens.insert_many([
+            build_refresh_token_doc(username, user_tokens["refresh"])
+            for username, user_tokens in tokens.items()
+        ]),
+    )
+    return tokens
+
+
+@pytest_asyncio.fixture(scope="session")
+async def make_user(test_db, seeded_users: dict):
+    """Factory: `await make_user(username)` creates the user once and returns its tokens
+    
+    Calls are memoized per username for the whole session, so repeated use is free.
+    """
+    created = dict(seeded_users)
+    
+    async def _make(username: str, password: str = "testpass123", role: UserRole = UserRole.USER) -> dict:
+        if username not in created:
+            tokens = mint_tokens(username, role)
+            await asyncio.gather(
+                # Upsert: the account may already exist (e.g. created through the API)
+                test_db.users.update_one(
+                    {"username": username},
+                    {"$setOnInsert": build_user_doc(username, auth.get_password_hash(password), role)},
+                    upsert=True
+                ),
+                # JWTs minted in the same second are identical, so a login may already have stored this token
+                test_db.refresh_tokens.update_one(
+                    {"token": tokens["refresh"]},
+                    {"$setOnInsert": build_refresh_token_doc(username, tokens["refresh"])},
+                    upsert=True
+                ),
+            )
+            created[username] = tokens
+        return created[username]
+    
+    return _make
+
+
+@pytest_asyncio.fixture(scope="session")
+async def make_story(test_db, seeded_users: dict):
+    """Factory: `await make_story(status=...)` inserts a story straight into the database and returns its id"""
+    async def _make(username: str = "test_session_user", status: StoryStatus = StoryStatus.DRAFT, **fields) -> str:
+        author = await test_db.users.find_one({"username": username})
+        now = datetime.utcnow()
+        story_doc = {
+            "title": "Seeded Story",
+            "description": "Seeded story description",
+            "cover_image": None,
+            "tags": [],
+            "mature_content": False,
+            "author_id": str(author["_id"]),
+            "author_anonymous_name": author["anonymous_name"],
+            "status": status,
+            "created_at": now,
+            "updated_at": now,
+            "published_at": now if status == StoryStatus.APPROVED else None,
+            "rejection_reason": None,
+            "likes": 0,
+            "liked_by": [],
+            **fields
+        }
+        result = await test_db.stories.insert_one(story_doc)
+        return str(result.inserted_id)
+    
+    return _make
+
+
+@pytest_asyncio.fixture(scope="session")
+async def user_tokens(seeded_users: dict):
+    # Shared by every test that just needs a logged-in user
+    return seeded_users["test_session_user"]
+
+
+@pytest_asyncio.fixture(scope="session")
+async def auth_token(user_tokens: dict):
+    return user_tokens["access"]
@@ -1,213 +1,105 @@
+import orjson
 import pytest
-import pytest_asyncio
 from httpx import AsyncClient
-from main import app
-from database import get_database
 from config import get_settings
 
 settings = get_settings()
 
+_PWD = "testpass123"
 
-@pytest_asyncio.fixture
-async def client():
-    async with AsyncClient(app=app, base_url="http://test") as ac:
-        yield ac
 
-
-@pytest_asyncio.fixture
-async def test_db():
-    db = await get_database()
-    yield db
-    # Cleanup after tests
-    await db.users.delete_many({"username": {"$regex": "^test_"}})
-    await db.stories.delete_many({})
-    await db.refresh_tokens.delete_many({})
-
-
-@pytest.mark.asyncio
-async def test_register_user(client: AsyncClient):
-    response = await client.post(
-        "/api/auth/register",
-        json={
-            "username": "test_user1",
-            "password": "testpass123"
-        }
-    )
-    assert response.status_code == 201
-    data = response.json()
-    assert data["username"] == "test_user1"
-    assert "anonymous_name" in data
-    assert data["role"] == "user"
+def credentials(username: str, password: str = _PWD) -> dict:
+    """Register/login request body"""
+    return {"username": username, "password": password}
 
 
+@pytest.mark.parametrize("username,existing,expected_status", [
+    ("test_user1", False, 201),
+    ("test_user2", True, 400),  # duplicate username
+])
 @pytest.mark.asyncio
-async def test_register_duplicate_username(client: AsyncClient):
-    # Register first user
-    await client.post(
-        "/api/auth/register",
-        json={
-            "username": "test_user2",
-            "password": "testpass123"
-        }
-    )
+async def test_register(jpost, make_user, username: str, existing: bool, expected_status: int):
+    if existing:
+        await make_user(username)
     
-    # Try to register with same username
-    response = await client.post(
+    response = await jpost(
         "/api/auth/register",
-        json={
-            "username": "test_user2",
-            "password": "testpass123"
-        }
-    )
-    assert response.status_code == 400
-    assert "already registered" in response.json()["detail"]
-
-
-@pytest.mark.asyncio
-async def test_login_user(client: AsyncClient):
-    # Register user
-    await client.post(
-        "/api/auth/register",
-        json={
-            "username": "test_user3",
-            "password": "testpass123"
-        }
-    )
-    
-    # Login
-    response = await client.post(
-        "/api/auth/login",
-        json={
-            "username": "test_user3",
-            "password": "testpass123"
-        }
-    )
-    assert response.status_code == 200
-    data = response.json()
-    assert "access_token" in data
-    assert "refresh_token" in data
-    assert data["token_type"] == "bearer"
-
-
+        credentials(username)
+    )
+    assert response.status_code == expected_status
+    data = orjson.loads(response.content)
+    if expected_status == 201:
+        assert data["username"] == username
+        assert "anonymous_name" in data
+        assert data["role"] == "user"
+    else:
+        assert "already registered" in data["detail"]
+
+
+@pytest.mark.parametrize("username,password,expected_status", [
+    ("test_user3", _PWD, 200),
+    ("test_user4", "wrongpassword", 401),
+])
 @pytest.mark.asyncio
-async def test_login_wrong_password(client: AsyncClient):
-    # Register user
-    await client.post(
-        "/api/auth/register",
-        json={
-            "username": "test_user4",
-            "password": "testpass123"
-        }
-    )
+async def test_login(jpost, make_user, username: str, password: str, expected_status: int):
+    # Create the user directly; only login goes through the API
+    await make_user(username)
     
-    # Login with wrong password
-    response = await client.post(
+    response = await jpost(
         "/api/auth/login",
-        json={
-            "username": "test_user4",
-            "password": "wrongpassword"
-        }
+        credentials(username, password)
     )
-    assert response.status_code == 401
+    assert response.status_code == expected_status
+    if expected_status == 200:
+        data = orjson.loads(response.content)
+        assert "access_token" in data
+        assert "refresh_token" in data
+        assert data["token_type"] == "bearer"
 
 
 @pytest.mark.asyncio
-async def test_admin_login(client: AsyncClient):
-    response = await client.post(
+async def test_admin_login(jpost):
+    response = await jpost(
         "/api/auth/login",
-        json={
-            "username": settings.admin_username,
-            "password": settings.admin_password
-        }
+        credentials(settings.admin_username, settings.admin_password)
     )
     assert response.status_code == 200
-    data = response.json()
+    data = orjson.loads(response.content)
     assert "access_token" in data
 
 
 @pytest.mark.asyncio
-async def test_get_current_user(client: AsyncClient):
-    # Register and login
-    await client.post(
-        "/api/auth/register",
-        json={
-            "username": "test_user5",
-            "password": "testpass123"
-        }
-    )
-    
-    login_response = await client.post(
-        "/api/auth/login",
-        json={
-            "username": "test_user5",
-            "password": "testpass123"
-        }
-    )
-    token = login_response.json()["access_token"]
-    
+async def test_get_current_user(client: AsyncClient, auth_token: str):
     # Get current user
     response = await client.get(
         "/api/auth/me",
-        headers={"Authorization": f"Bearer {token}"}
+        headers={"Authorization": f"Bearer {auth_token}"}
     )
     assert response.status_code == 200
-    data = response.json()
-    assert data["username"] == "test_user5"
+    data = orjson.loads(response.content)
+    assert data["username"] == "test_session_user"
 
 
 @pytest.mark.asyncio
-async def test_refresh_token(client: AsyncClient):
-    # Register and login
-    await client.post(
-        "/api/auth/register",
-        json={
-            "username": "test_user6",
-            "password": "testpass123"
-        }
-    )
-    
-    login_response = await client.post(
-        "/api/auth/login",
-        json={
-            "username": "test_user6",
-            "password": "testpass123"
-        }
-    )
-    refresh_token = login_response.json()["refresh_token"]
-    
+async def test_refresh_token(jpost, user_tokens: dict):
     # Refresh token
-    response = await client.post(
+    response = await jpost(
         "/api/auth/refresh",
-        json={"refresh_token": refresh_token}
+        {"refresh_token": user_tokens["refresh"]}
     )
     assert response.status_code == 200
-    data = response.json()
+    data = orjson.loads(response.content)
     assert "access_token" in data
     assert "refresh_token" in data
 
 
 @pytest.mark.asyncio
-async def test_logout(client: AsyncClient):
-    # Register and login
-    await client.post(
-        "/api/auth/register",
-        json={
-            "username": "test_user7",
-            "password": "testpass123"
-        }
-    )
-    
-    login_response = await client.post(
-        "/api/auth/login",
-        json={
-            "username": "test_user7",
-            "password": "testpass123"
-        }
-    )
-    token = login_response.json()["access_token"]
+async def test_logout(smoke_client: AsyncClient, seeded_users: dict):
+    # Own user: logout revokes every session of the user
+    token = seeded_users["test_user7"]["access"]
     
     # Logout
-    response = await client.post(
+    response = await smoke_client.post(
         "/api/auth/logout",
         headers={"Authorization": f"Bearer {token}"}
     )
@@ -0,0 +1,91 @@
+from datetime import datetime
+import orjson
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from httpx import AsyncClient
+from routes.videos import valid_video_oid, encode_feed_cursor, decode_feed_cursor
+
+
+def test_valid_video_oid():
+    video_id = "a" * 24
+    assert valid_video_oid(video_id) == ObjectId(video_id)
+
+
+@pytest.mark.parametrize("video_id", [
+    "a" * 24 + "\n",  # "$" alone would let the trailing newline through
+    "not-an-object-id",
+    "g" * 24,
+])
+def test_valid_video_oid_rejects_malformed(video_id: str):
+    with pytest.raises(HTTPException) as exc_info:
+        valid_video_oid(video_id)
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_video_malformed_id(client: AsyncClient):
+    response = await client.get("/api/videos/" + "a" * 24 + "%0A")
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_videos_pages_with_cursor(client: AsyncClient, test_db):
+    now = datetime.utcnow()
+    await test_db.videos.insert_many([
+        {
+            "video_url": f"/uploads/videos/feed{n}.mp4",
+            "caption": f"Feed video {n}",
+            "tags": [],
+            "author_id": "feed_author",
+            "author_anonymous_name": "Feed Author",
+            "status": "approved",
+            "created_at": now.replace(second=n),
+            "updated_at": now,
+        }
+        for n in range(3)
+    ])
+    
+    first = await client.get("/api/videos/", params={"page_size": 2})
+    assert first.status_code == 200
+    first_data = orjson.loads(first.content)
+    assert first_data["total"] == 3
+    assert [video["caption"] for video in first_data["videos"]] == ["Feed video 2", "Feed video 1"]
+    
+    second = await client.get("/api/videos/", params={"page_size": 2, "after": first_data["next_cursor"]})
+    second_data = orjson.loads(second.content)
+    assert second_data["total"] is None
+    assert [video["caption"] for video in second_data["videos"]] == ["Feed video 0"]
+    assert second_data["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_create_video_timestamps_match_reads(jpost, client: AsyncClient, auth_token: str):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    create_response = await jpost(
+        "/api/videos/",
+        {"video_url": "/uploads/videos/created.mp4", "caption": "Created video", "tags": []},
+        headers=headers
+    )
+    assert create_response.status_code == 200
+    created = orjson.loads(create_response.content)
+    
+    response = await client.get(f"/api/videos/{created['id']}", headers=headers)
+    fetched = orjson.loads(response.content)
+    assert fetched["created_at"] == created["created_at"]
+    assert fetched["updated_at"] == created["updated_at"]
+
+
+def test_feed_cursor_round_trip():
+    video = {"_id": ObjectId(), "created_at": datetime(2024, 5, 1, 12, 30, 15, 123000)}
+    
+    created_at, last_id = decode_feed_cursor(encode_feed_cursor(video))
+    assert created_at == video["created_at"]
+    assert last_id == video["_id"]
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", "e30="])  # "e30=" is {} with no position
+def test_decode_feed_cursor_rejects_invalid(cursor: str):
+    with pytest.raises(HTTPException) as exc_info:
+        decode_feed_cursor(cursor)
+    assert exc_info.value.status_code == 400